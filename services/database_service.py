@@ -1,11 +1,71 @@
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 from pathlib import Path
 from services.logger import Logger
 import csv
+import itertools
 import os
+import queue
+import tempfile
+import threading
 from typing import List, Dict, Optional, Any, Union
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+except ImportError:  # optional dependency
+    pa = None
+    pacsv = None
+
+try:
+    import sqlparse
+except ImportError:  # optional dependency
+    sqlparse = None
+
+# Rows are shipped from the CSV parser to the insert path in batches of this
+# size; the bounded queue keeps the parser from outrunning the database.
+BATCH_SIZE = 1000
+QUEUE_DEPTH = 4
+
+# Above this many rows the UNIQUE index is dropped for the duration of the
+# load and rebuilt afterwards in one sorted pass; per-row index maintenance
+# dominates the insert cost on files that size.
+BULK_INDEX_THRESHOLD = 100_000
+
+# One pool per distinct server/database, shared by every DatabaseService
+# instance so repeated uploads skip the TCP+auth handshake.
+POOL_SIZE = 8
+_POOLS: Dict[tuple, pooling.MySQLConnectionPool] = {}
+
+# Column-type routing for _create_table, keyed on lowercase header names
+UNIQUE_KEY_COLUMNS = frozenset({'order', 'sealed_unit_id', 'f', 'j'})
+DECIMAL_COLUMNS = frozenset({'width', 'height', 'qty'})
+DATE_COLUMN_HINTS = ('date', 'time')
+
+# Candidate duplicate-check keys, highest priority first
+KEY_FIELD_PRIORITY = ('sealed_unit_id', 'order', 'F', 'J')
+
+# Fallback headers for files that arrive without a header row
+DEFAULT_HEADERS = {
+    'glassreport': [
+        'order_date', 'list_date', 'sealed_unit_id', 'ot', 'window_type', 'line1',
+        'line2', 'line3', 'grills', 'spacer', 'dealer', 'glass_comment', 'tag', 'zones', 'u_value',
+        'solar_heat_gain', 'visual_trasmittance', 'energy_rating', 'glass_type', 'order', 'width',
+        'height', 'qty', 'description', 'note1', 'note2', 'rack_id', 'complete', 'shipping'
+    ],
+
+    'framescutting': [
+        "A", "B", "C", "D", "E", "F", "G", "H", "I", "J", "K", "L", "M", "N", "O", "P", "Q",
+        "R", "S", "T", "U", "V", "W", "X", "Y", "Z"
+    ],
+    #'rush': ['order', 'priority', 'due_date', 'description'],
+    #'default': ['order', 'field1', 'field2', 'field3', 'quantity']
+}
+
+# Date column used when reporting duplicates, per table type
+DATE_FIELD_BY_TYPE = {'glassreport': 'list_date'}
+DEFAULT_DATE_FIELD = 'U'
+
 
 class DatabaseService:
     def __init__(self, host, database, user, password, port=3306):
@@ -15,149 +75,319 @@ class DatabaseService:
             'database': database,
             'user': user,
             'password': password,
-            'port': port
+            'port': port,
+            'allow_local_infile': True,
+            # C extension: executemany rewrites simple INSERTs into one
+            # multi-row VALUES packet instead of N statements
+            'use_pure': False
         }
-        self.connection = None
+        self._pool = None
+        self._known_tables = set()
+        self._columns_cache = {}
         self.connect()
 
     def connect(self):
-        """Establish database connection"""
+        """Ensure the shared connection pool exists for this database"""
         try:
-            if self.connection and self.connection.is_connected():
-                return True
-                
-            self.connection = mysql.connector.connect(**self.config)
-            if self.connection.is_connected():
-                self.logger.info(f"Connected to MySQL database '{self.config['database']}'")
+            if self._pool is not None:
                 return True
+
+            key = (
+                self.config['host'], self.config['port'],
+                self.config['database'], self.config['user'],
+            )
+            pool = _POOLS.get(key)
+            if pool is None:
+                pool = pooling.MySQLConnectionPool(
+                    pool_name=f"{self.config['database']}_{self.config['port']}",
+                    pool_size=POOL_SIZE,
+                    pool_reset_session=False,
+                    **self.config
+                )
+                _POOLS[key] = pool
+                self.logger.info(f"Created connection pool for '{self.config['database']}'")
+            self._pool = pool
+            return True
         except Error as e:
             self.logger.error(f"Error connecting to MySQL: {str(e)}")
             return False
 
+    def _acquire(self):
+        """Check a connection out of the pool; close() returns it"""
+        if not self.connect():
+            return None
+        try:
+            return self._pool.get_connection()
+        except Error as e:
+            self.logger.error(f"Error acquiring pooled connection: {str(e)}")
+            return None
+
     def disconnect(self):
-        """Close database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
-            self.logger.info("Database connection closed")
+        """Connections live in the shared pool; nothing to tear down"""
+        pass
 
     def execute_query(self, query, params=None):
         """Execute query with MariaDB-specific handling"""
-        if not self.test_connection():
+        connection = self._acquire()
+        if not connection:
             self.logger.error("No database connection")
             return False
-            
+
         cursor = None
         try:
-            cursor = self.connection.cursor()
-            
+            cursor = connection.cursor()
+
             # Log the query before execution
             self.logger.debug(f"Executing query: {query}")
-            
+
             cursor.execute(query, params or ())
-            
+
             if query.strip().lower().startswith('select'):
                 return cursor.fetchall()
-                
-            self.connection.commit()
+
+            connection.commit()
             return cursor.rowcount
-            
+
         except Error as e:
             self.logger.error(f"Query failed (MariaDB): {str(e)}")
-            self.connection.rollback()
+            connection.rollback()
             return False
         finally:
             if cursor:
                 cursor.close()
+            connection.close()
 
     def upload_csv_data(self, table_name, csv_file_path, email_notifier=None):
         """Upload CSV data with robust delimiter detection and proper email notification"""
-        if not self.connect():
+        connection = self._acquire()
+        if not connection:
             return False
-        
+
         cursor = None
+        spool = None
+        index_dropped = False
         try:
+            # One explicit transaction around the whole load: a single
+            # redo-log flush at commit instead of one per statement.
+            connection.start_transaction()
             # 1. Detect table type and get default headers
             table_type = self._detect_table_type(table_name)
             default_headers = self._get_default_headers(table_type)
             
             # 2. Process CSV file with multiple delimiter fallbacks
-            with open(csv_file_path, 'r', encoding='utf-8-sig') as csvfile:
+            # 1 MiB read buffer: the parser pulls large sequential chunks
+            # instead of the 8 KiB default
+            with open(csv_file_path, 'r', encoding='utf-8-sig', buffering=1 << 20) as csvfile:
                 sample = csvfile.read(2048)  # Read larger sample for better detection
                 csvfile.seek(0)
                 
                 # Try common delimiters if auto-detection fails
+                sniffer = csv.Sniffer()
                 for delimiter in [',', ';', '\t', '|']:
                     try:
-                        dialect = csv.Sniffer().sniff(sample, delimiters=delimiter)
-                        has_header = csv.Sniffer().has_header(sample)
+                        dialect = sniffer.sniff(sample, delimiters=delimiter)
                         break
                     except csv.Error:
                         continue
                 else:
                     # Final fallback to comma delimiter
                     dialect = csv.excel()
-                    has_header = False
                     self.logger.warning("Using comma as fallback delimiter")
+
+                # Header detection re-sniffs the sample internally, so run
+                # it once rather than per delimiter attempt
+                try:
+                    has_header = sniffer.has_header(sample)
+                except csv.Error:
+                    has_header = False
                 
                 if not has_header and not default_headers:
                     self.logger.error("CSV has no headers and no default headers")
                     return False
                 
-                # Create reader with detected settings
+                # Positional reader: rows come back as plain lists already
+                # in column order, no per-row dict machinery
+                reader = csv.reader(csvfile, dialect=dialect)
                 if has_header:
-                    reader = csv.DictReader(csvfile, dialect=dialect)
-                    headers = [h.strip() for h in reader.fieldnames]
+                    headers = [h.strip() for h in next(reader)]
                 else:
-                    content = csvfile.readlines()
                     headers = default_headers
-                    reader = csv.DictReader(content, fieldnames=headers, dialect=dialect)
-            
-            # 3. Create table if needed
-            cursor = self.connection.cursor()
-            if not self._table_exists(cursor, table_name):
-                if not self._create_table(table_name, headers):
-                    return False
-            
-            # 4. Process rows with duplicate checking
-            new_rows = 0
-            duplicate_rows = 0
-            duplicates = []  # Store complete duplicate info
-            
-            key_field = self._get_key_field(headers)
-            date_field = self._get_date_field(table_type)
-            
-            for row in reader:
+
+                # 3. Create table if needed
+                cursor = connection.cursor()
+                if not self._table_exists(cursor, table_name):
+                    if not self._create_table(cursor, table_name, headers):
+                        return False
+
+                # 4. Process rows with duplicate checking.
+                # Parsing (CPU-bound, GIL-held) and the MySQL round-trips
+                # (network-bound) are overlapped: a producer thread feeds
+                # cleaned row batches through a bounded queue while this
+                # thread owns the cursor and issues the inserts.
+                new_rows = 0
+                duplicate_rows = 0
+                duplicates = []  # Store complete duplicate info
+
+                key_field = self._get_key_field(headers)
+                date_field = self._get_date_field(table_type)
+
+                # For very large files, suspend the UNIQUE index and let the
+                # server deduplicate once after the load instead of updating
+                # the B-tree on every insert.
+                # The post-load dedupe pass keys on `id`, so bulk mode is
+                # only safe on tables that have that column.
+                bulk_mode = False
+                if (
+                    key_field
+                    and self._has_column(cursor, table_name, 'id')
+                    and self._count_csv_rows(csv_file_path) > BULK_INDEX_THRESHOLD
+                ):
+                    bulk_mode = self._drop_unique_index(cursor, table_name, key_field)
+                    index_dropped = bulk_mode
+
+                date_column = date_field if date_field in headers else None
+
+                columns = [self._quote_identifier(col) for col in headers]
+                placeholders = ['%s'] * len(headers)
+                # Single-line, single VALUES clause so the connector's
+                # multi-row rewrite kicks in for executemany. IGNORE lets the
+                # UNIQUE index enforce duplicates server-side.
+                insert_query = (
+                    f"INSERT IGNORE INTO {self._quote_identifier(table_name)} ({','.join(columns)}) "
+                    f"VALUES ({','.join(placeholders)})"
+                )
+
+                batch_queue = queue.Queue(maxsize=QUEUE_DEPTH)
+                producer_error = []
+
+                # Prefer spooling filtered rows to a temp file and shipping
+                # them in one LOAD DATA LOCAL INFILE; fall back to batched
+                # inserts when the server refuses local infile.
+                use_infile = self._supports_local_infile(cursor)
+                spool = None
+                if use_infile:
+                    spool = tempfile.NamedTemporaryFile(
+                        'w', suffix='.tsv', delete=False, encoding='utf-8', newline=''
+                    )
+
+                if pacsv is not None:
+                    # Vectorized parse; the stdlib reader is only kept to
+                    # discover the header row above.
+                    rows = self._iter_rows_arrow(
+                        csv_file_path, headers, has_header, dialect.delimiter
+                    )
+                else:
+                    width = len(headers)
+
+                    def clean(row):
+                        # Pad/trim ragged rows to the header width
+                        if len(row) != width:
+                            row = (row + [None] * width)[:width]
+                        return tuple(
+                            v.strip() or None if isinstance(v, str) else v
+                            for v in row
+                        )
+
+                    rows = map(clean, reader)
+
+                def produce():
+                    # Slice the row generator into fixed-size chunks; only
+                    # QUEUE_DEPTH batches ever exist at once, so memory stays
+                    # flat no matter how large the file is.
+                    try:
+                        while batch := list(itertools.islice(rows, BATCH_SIZE)):
+                            batch_queue.put(batch)
+                    except Exception as e:
+                        producer_error.append(e)
+                    finally:
+                        batch_queue.put(None)
+
+                producer = threading.Thread(target=produce, daemon=True)
+                producer.start()
+
+                spooled_rows = 0
+                key_index = headers.index(key_field) if key_field else None
+                date_index = headers.index(date_column) if date_column else None
+                # Keys seen earlier in this same file, with the date of their
+                # first occurrence. The table probe cannot see them (in the
+                # LOAD DATA path nothing is inserted until the spool ships),
+                # so intra-file collisions are itemized from this map.
+                file_keys = {}
+
                 try:
-                    clean_row = {k: v.strip() if v else None for k, v in row.items()}
-                    
-                    if key_field and clean_row.get(key_field):
-                        key_value = clean_row[key_field]
-                        existing = self._check_duplicate(cursor, table_name, key_field, key_value)
-                        
-                        if existing:
-                            duplicate_rows += 1
-                            original_date = existing
-                            duplicates.append((key_value, original_date))
-                            
-                            continue
-                    
-                    # Insert new row
-                    columns = [f"`{col}`" for col in headers]
-                    placeholders = ['%s'] * len(headers)
-                    values = [clean_row.get(col) for col in headers]
-                    
-                    query = f"""
-                    INSERT INTO `{table_name}` ({','.join(columns)})
-                    VALUES ({','.join(placeholders)})
-                    """
-                    cursor.execute(query, values)
-                    new_rows += 1
-                    
-                except Exception as e:
-                    self.logger.error(f"Row processing error: {str(e)}")
-                    continue
-            
-            self.connection.commit()
+                    while (batch := batch_queue.get()) is not None:
+                        # The server enforces uniqueness now; this one IN (...)
+                        # probe per batch only captures original dates for the
+                        # duplicate notification.
+                        if not bulk_mode and key_field:
+                            batch_keys = []
+                            for row in batch:
+                                key_value = row[key_index]
+                                if not key_value:
+                                    continue
+                                if key_value in file_keys:
+                                    duplicates.append({
+                                        'order': key_value,
+                                        'original_date': file_keys[key_value],
+                                    })
+                                else:
+                                    file_keys[key_value] = (
+                                        row[date_index] if date_index is not None else None
+                                    )
+                                    batch_keys.append(key_value)
+                            existing_map = self._fetch_existing_keys(
+                                cursor, table_name, key_field, date_column, batch_keys
+                            )
+                            for key_value, original_date in existing_map.items():
+                                duplicates.append({
+                                    'order': key_value,
+                                    'original_date': original_date,
+                                })
+
+                        if batch:
+                            if use_infile:
+                                spool.writelines(
+                                    '\t'.join(map(self._format_infile_value, row)) + '\n'
+                                    for row in batch
+                                )
+                                spooled_rows += len(batch)
+                            else:
+                                cursor.executemany(insert_query, batch)
+                                inserted = cursor.rowcount or 0
+                                new_rows += inserted
+                                duplicate_rows += len(batch) - inserted
+                except Exception:
+                    # The producer may be parked in put() on the full queue;
+                    # drain through to its None sentinel so the thread can
+                    # exit instead of leaking with its buffered batches.
+                    while batch_queue.get() is not None:
+                        pass
+                    producer.join()
+                    raise
+
+                producer.join()
+                if producer_error:
+                    raise producer_error[0]
+
+                if use_infile:
+                    spool.close()
+                    try:
+                        loaded = self._load_data_infile(
+                            cursor, table_name, columns, spool.name, bulk_mode
+                        )
+                    finally:
+                        os.unlink(spool.name)
+                    spool = None
+                    new_rows += loaded
+                    duplicate_rows += spooled_rows - loaded
+
+                if bulk_mode:
+                    removed = self._dedupe_and_restore_index(cursor, table_name, key_field)
+                    index_dropped = False
+                    duplicate_rows += removed
+                    new_rows -= removed
+
+            connection.commit()
             self.logger.info(f"Inserted {new_rows} rows, skipped {duplicate_rows} duplicates")
             
             # 5. Send proper email notification
@@ -165,8 +395,7 @@ class DatabaseService:
                 try:
                     email_notifier.notify_duplicate(
                         table_name=table_name,
-                        file_name=os.path.basename(csv_file_path),
-                        duplicate_info=duplicates,
+                        duplicates=duplicates,
                         key_field=key_field
                     )
                 except Exception as e:
@@ -176,79 +405,270 @@ class DatabaseService:
             
         except Exception as e:
             self.logger.error(f"Upload failed: {str(e)}")
-            self.connection.rollback()
+            connection.rollback()
             return False
         finally:
+            if spool:
+                spool.close()
+                try:
+                    os.unlink(spool.name)
+                except OSError:
+                    pass
+            # Never return a connection to the pool mid-transaction
+            if connection.in_transaction:
+                connection.rollback()
+            # The index drop is DDL and commits implicitly, so a rollback
+            # cannot bring it back. Rebuild it here (after the rollback has
+            # discarded the partial load) or every later upload runs
+            # INSERT IGNORE against an unconstrained table.
+            if index_dropped and cursor:
+                self._restore_unique_index(cursor, table_name, key_field)
             if cursor:
                 cursor.close()
-            self.disconnect()
+            connection.close()
 
-    def _create_table(self, table_name, headers):
-        """Create table with appropriate structure"""
-        cursor = None
+    @staticmethod
+    def _quote_identifier(name):
+        """Backtick-quote an identifier, escaping embedded backticks"""
+        return '`' + str(name).replace('`', '``') + '`'
+
+    def _fetch_existing_keys(self, cursor, table_name, key_field, date_column, keys):
+        """Map already-present key values to their original date in one query"""
+        existing = {}
+        if not keys:
+            return existing
+        key_sql = self._quote_identifier(key_field)
+        table_sql = self._quote_identifier(table_name)
+        date_sql = self._quote_identifier(date_column) if date_column else "NULL"
+        # Chunk the IN list to stay well under max_allowed_packet
+        for start in range(0, len(keys), 5000):
+            chunk = keys[start:start + 5000]
+            placeholders = ','.join(['%s'] * len(chunk))
+            cursor.execute(
+                f"SELECT {key_sql}, {date_sql} FROM {table_sql} "
+                f"WHERE {key_sql} IN ({placeholders})",
+                tuple(chunk)
+            )
+            existing.update(cursor.fetchall())
+        return existing
+
+    def _supports_local_infile(self, cursor):
+        """Check whether the server will accept LOAD DATA LOCAL INFILE"""
+        try:
+            cursor.execute("SELECT @@local_infile")
+            row = cursor.fetchone()
+            return bool(row and row[0])
+        except Error:
+            return False
+
+    @staticmethod
+    def _format_infile_value(value):
+        """Format one value for the tab-separated LOAD DATA spool file"""
+        if value is None:
+            return '\\N'
+        return (
+            str(value)
+            .replace('\\', '\\\\')
+            .replace('\t', '\\\t')
+            .replace('\n', '\\\n')
+            .replace('\r', '\\\r')
+        )
+
+    def _load_data_infile(self, cursor, table_name, columns, spool_path, relax_checks):
+        """Bulk-load the spooled rows with a single LOAD DATA LOCAL INFILE"""
+        if relax_checks:
+            cursor.execute("SET SESSION unique_checks=0")
+            cursor.execute("SET SESSION foreign_key_checks=0")
+        try:
+            escaped_path = spool_path.replace('\\', '\\\\').replace("'", "\\'")
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE '{escaped_path}' "
+                f"IGNORE INTO TABLE {self._quote_identifier(table_name)} "
+                "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                "LINES TERMINATED BY '\\n' "
+                f"({','.join(columns)})"
+            )
+            loaded = cursor.rowcount or 0
+            self.logger.info(f"Bulk-loaded {loaded} rows into `{table_name}` via LOAD DATA")
+            return loaded
+        finally:
+            if relax_checks:
+                cursor.execute("SET SESSION foreign_key_checks=1")
+                cursor.execute("SET SESSION unique_checks=1")
+
+    def _count_csv_rows(self, csv_file_path):
+        """Fast newline count used to decide whether a load is 'bulk'"""
+        count = 0
+        with open(csv_file_path, 'rb') as handle:
+            while chunk := handle.read(1 << 20):
+                count += chunk.count(b'\n')
+        return count
+
+    def _drop_unique_index(self, cursor, table_name, key_field):
+        """Drop the UNIQUE index on the key column before a bulk load"""
+        try:
+            cursor.execute(
+                f"ALTER TABLE {self._quote_identifier(table_name)} "
+                f"DROP INDEX {self._quote_identifier(key_field)}"
+            )
+            self.logger.info(f"Dropped UNIQUE index on `{key_field}` for bulk load")
+            return True
+        except Error as e:
+            self.logger.warning(f"Could not drop index for bulk load: {str(e)}")
+            return False
+
+    def _restore_unique_index(self, cursor, table_name, key_field):
+        """Best-effort rebuild of the UNIQUE index after a failed bulk load"""
+        try:
+            cursor.execute(
+                f"ALTER TABLE {self._quote_identifier(table_name)} "
+                f"ADD UNIQUE ({self._quote_identifier(key_field)})"
+            )
+            self.logger.info(f"Restored UNIQUE index on `{key_field}` after failed bulk load")
+        except Error as e:
+            self.logger.error(f"Could not restore UNIQUE index on `{key_field}`: {str(e)}")
+
+    def _dedupe_and_restore_index(self, cursor, table_name, key_field):
+        """Deduplicate in one server-side pass and rebuild the UNIQUE index"""
+        table_sql = self._quote_identifier(table_name)
+        key_sql = self._quote_identifier(key_field)
+        cursor.execute(
+            f"DELETE t1 FROM {table_sql} t1 "
+            f"JOIN {table_sql} t2 "
+            f"ON t1.{key_sql} = t2.{key_sql} AND t1.id > t2.id"
+        )
+        removed = cursor.rowcount or 0
+        cursor.execute(f"ALTER TABLE {table_sql} ADD UNIQUE ({key_sql})")
+        self.logger.info(f"Rebuilt UNIQUE index on `{key_field}`, removed {removed} duplicates")
+        return removed
+
+    def _iter_rows_arrow(self, csv_file_path, headers, has_header, delimiter):
+        """Stream cleaned row dicts through pyarrow's vectorized CSV parser"""
+        read_options = pacsv.ReadOptions(
+            block_size=1 << 22,
+            # Always supply the caller's stripped names (skipping the file's
+            # own header row if present): letting Arrow read raw header
+            # cells would miss the column_types pinning below whenever a
+            # header carries surrounding whitespace.
+            column_names=headers,
+            skip_rows=1 if has_header else 0,
+        )
+        parse_options = pacsv.ParseOptions(delimiter=delimiter)
+        # Pin every column to string so this path is behavior-identical to
+        # the stdlib reader: without it Arrow's type inference turns
+        # zero-padded IDs into ints and date-like columns into date objects.
+        convert_options = pacsv.ConvertOptions(
+            column_types={header: pa.string() for header in headers},
+        )
+
+        # open_csv yields RecordBatch objects so memory stays constant
+        # regardless of file size
+        with pacsv.open_csv(
+            csv_file_path,
+            read_options=read_options,
+            parse_options=parse_options,
+            convert_options=convert_options,
+        ) as arrow_reader:
+            for record_batch in arrow_reader:
+                columns = [
+                    record_batch.column(i).to_pylist()
+                    for i in range(record_batch.num_columns)
+                ]
+                for values in zip(*columns):
+                    yield tuple(
+                        value.strip() or None if isinstance(value, str) else value
+                        for value in values
+                    )
+
+    def _create_table(self, cursor, table_name, headers):
+        """Create table with appropriate structure on the caller's cursor"""
         try:
-            cursor = self.connection.cursor()
             
-            # Define column types based on field names
+            # Define column types based on field names; one lowercase pass
+            # per header against precompiled sets
             columns = []
             for header in headers:
-                clean_header = header.replace(' ', '_')
-                
+                clean_header = self._quote_identifier(header.replace(' ', '_'))
+                lowered = header.lower()
+
                 # Special handling for key fields
-                if header.lower() in ['order', 'sealed_unit_id', 'f', 'j']:
-                    col_def = f"`{clean_header}` VARCHAR(255) UNIQUE"
-                elif header.lower() in ['width', 'height', 'qty']:
-                    col_def = f"`{clean_header}` DECIMAL(10,2)"
-                elif any(x in header.lower() for x in ['date', 'time']):
-                    col_def = f"`{clean_header}` DATE"
+                if lowered in UNIQUE_KEY_COLUMNS:
+                    col_def = f"{clean_header} VARCHAR(255) UNIQUE"
+                elif lowered in DECIMAL_COLUMNS:
+                    col_def = f"{clean_header} DECIMAL(10,2)"
+                elif any(hint in lowered for hint in DATE_COLUMN_HINTS):
+                    col_def = f"{clean_header} DATE"
                 else:
-                    col_def = f"`{clean_header}` TEXT"
-                
+                    col_def = f"{clean_header} TEXT"
+
                 columns.append(col_def)
             
             # Create table query
             query = f"""
-            CREATE TABLE `{table_name}` (
+            CREATE TABLE {self._quote_identifier(table_name)} (
                 `id` INT AUTO_INCREMENT PRIMARY KEY,
                 {','.join(columns)},
                 `created_at` TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
             """
             
+            # DDL commits implicitly in MySQL; no explicit commit needed
             cursor.execute(query)
-            self.connection.commit()
+            self._known_tables.add(table_name)
+            self._columns_cache.pop(table_name, None)
             self.logger.info(f"Created table '{table_name}' with {len(headers)} columns")
             return True
             
         except Exception as e:
             self.logger.error(f"Failed to create table: {str(e)}")
             return False
-        finally:
-            if cursor:
-                cursor.close()
 
     def _table_exists(self, cursor, table_name):
-        """Check if table exists in database"""
-        cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
+        """Check if table exists, with a per-instance positive cache"""
+        if table_name in self._known_tables:
+            return True
+        cursor.execute(
+            "SELECT 1 FROM information_schema.tables "
+            "WHERE table_schema = %s AND table_name = %s LIMIT 1",
+            (self.config['database'], table_name)
+        )
+        exists = cursor.fetchone() is not None
+        if exists:
+            self._known_tables.add(table_name)
+        return exists
+
+    def _has_column(self, cursor, table_name, column_name):
+        """Check whether a table has a given column"""
+        cursor.execute(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = %s AND table_name = %s AND column_name = %s "
+            "LIMIT 1",
+            (self.config['database'], table_name, column_name)
+        )
         return cursor.fetchone() is not None
 
-    def _check_duplicate(self, cursor, table_name, key_field, key_value):
-        """Check for duplicate entry and return existing data"""
-        query = f"SELECT * FROM `{table_name}` WHERE `{key_field}` = %s LIMIT 1"
+    def _check_duplicate(self, cursor, table_name, key_field, key_value, date_column=None):
+        """Check for duplicate entry and return its original date if found"""
+        date_sql = self._quote_identifier(date_column) if date_column else "NULL"
+        query = (
+            f"SELECT {date_sql} FROM {self._quote_identifier(table_name)} "
+            f"WHERE {self._quote_identifier(key_field)} = %s LIMIT 1"
+        )
         cursor.execute(query, (key_value,))
         result = cursor.fetchone()
-        return dict(zip([col[0] for col in cursor.description], result)) if result else None
+        return {'original_date': result[0]} if result else None
 
     def _get_key_field(self, headers):
         """Determine the appropriate key field for duplicate checking"""
-        for field in ['sealed_unit_id', 'order', 'F', 'J']:
-            if field in headers:
+        header_set = set(headers)
+        for field in KEY_FIELD_PRIORITY:
+            if field in header_set:
                 return field
         return None
 
     def _get_date_field(self, table_type):
         """Get the appropriate date field based on table type"""
-        return 'list_date' if table_type == 'glassreport' else 'U'
+        return DATE_FIELD_BY_TYPE.get(table_type, DEFAULT_DATE_FIELD)
 
     def _detect_table_type(self, table_name):
         table_name = table_name.lower()
@@ -260,43 +680,32 @@ class DatabaseService:
             return 'default'
     
     def _get_default_headers(self, table_type):
-        default_headers = {
-            'glassreport': [
-                'order_date', 'list_date', 'sealed_unit_id', 'ot', 'window_type', 'line1',
-                'line2', 'line3', 'grills', 'spacer', 'dealer', 'glass_comment','tag', 'zones','u_value',
-                'solar_heat_gain','visual_trasmittance','energy_rating','glass_type','order','width',
-                'height', 'qty','description','note1','note2','rack_id','complete', 'shipping'
-                ],
-
-            'framescutting': [
-                "A","B","C","D","E","F","G","H","I","J","K","L","M","N","O","P","Q",
-                "R","S","T","U","V","W","X","Y","Z"
-                ],
-            #'rush': ['order', 'priority', 'due_date', 'description'],
-            #'default': ['order', 'field1', 'field2', 'field3', 'quantity']
-        }
-        return default_headers.get(table_type)
+        return DEFAULT_HEADERS.get(table_type)
 
     
     def test_connection(self) -> bool:
         """Test database connection"""
+        connection = self._acquire()
+        if not connection:
+            return False
         try:
-            if self.connection and self.connection.is_connected():
-                return True
-            return self.connect()
+            return connection.is_connected()
         except Error as e:
             self.logger.error(f"Connection test failed: {str(e)}")
             return False
+        finally:
+            connection.close()
 
     def get_tables(self) -> List[str]:
         """Get list of all tables in the database"""
-        if not self.test_connection():
+        connection = self._acquire()
+        if not connection:
             self.logger.error("Cannot get tables - no database connection")
             return []
-            
+
         cursor = None
         try:
-            cursor = self.connection.cursor()
+            cursor = connection.cursor()
             cursor.execute("SHOW TABLES")
             tables = [table[0] for table in cursor.fetchall()]
             return tables
@@ -306,18 +715,35 @@ class DatabaseService:
         finally:
             if cursor:
                 cursor.close()
+            connection.close()
 
     def get_columns(self, table_name: str) -> List[str]:
         """Get list of columns for a specific table"""
+        cached = self._columns_cache.get(table_name)
+        if cached is not None:
+            return list(cached)
+
+        connection = self._acquire()
+        if not connection:
+            return []
         try:
-            cursor = self.connection.cursor()
-            cursor.execute(f"DESCRIBE {table_name}")
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT column_name FROM information_schema.columns "
+                "WHERE table_schema = %s AND table_name = %s "
+                "ORDER BY ordinal_position",
+                (self.config['database'], table_name)
+            )
             columns = [column[0] for column in cursor.fetchall()]
             cursor.close()
-            return columns
+            if columns:
+                self._columns_cache[table_name] = columns
+            return list(columns)
         except Error as e:
             self.logger.error(f"Failed to get columns for table {table_name}: {str(e)}")
             return []
+        finally:
+            connection.close()
 
     def get_table_data(
         self,
@@ -326,24 +752,33 @@ class DatabaseService:
         limit: int = 100
     ) -> List[Dict[str, Any]]:
         """Get sample data from a table"""
+        connection = self._acquire()
+        if not connection:
+            return []
         try:
-            cursor = self.connection.cursor(dictionary=True)
+            cursor = connection.cursor(dictionary=True)
             
             # Build SELECT query
             if columns:
-                cols = ", ".join([f"`{col}`" for col in columns])
+                cols = ", ".join(self._quote_identifier(col) for col in columns)
             else:
                 cols = "*"
-                
-            query = f"SELECT {cols} FROM `{table_name}` LIMIT %s"
+
+            query = f"SELECT {cols} FROM {self._quote_identifier(table_name)} LIMIT %s"
             cursor.execute(query, (limit,))
-            
-            results = cursor.fetchall()
+
+            # Drain in fetchmany chunks so a large limit never materializes
+            # the whole result set twice
+            results = []
+            while chunk := cursor.fetchmany(BATCH_SIZE):
+                results.extend(chunk)
             cursor.close()
             return results
         except Error as e:
             self.logger.error(f"Failed to get data from {table_name}: {str(e)}")
             return []
+        finally:
+            connection.close()
 
     
 
@@ -354,27 +789,33 @@ class DatabaseService:
             'row_count': 0,
             'create_syntax': ''
         }
-        
+
+        connection = self._acquire()
+        if not connection:
+            return info
         try:
             # Get column details
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(f"SHOW COLUMNS FROM `{table_name}`")
+            cursor = connection.cursor(dictionary=True)
+            table_sql = self._quote_identifier(table_name)
+            cursor.execute(f"SHOW COLUMNS FROM {table_sql}")
             info['columns'] = cursor.fetchall()
             
             # Get row count
-            cursor.execute(f"SELECT COUNT(*) FROM `{table_name}`")
+            cursor.execute(f"SELECT COUNT(*) FROM {table_sql}")
             info['row_count'] = cursor.fetchone()[0]
             
             # Get create syntax
-            cursor.execute(f"SHOW CREATE TABLE `{table_name}`")
+            cursor.execute(f"SHOW CREATE TABLE {table_sql}")
             info['create_syntax'] = cursor.fetchone()[1]
             
             cursor.close()
             return info
-            
+
         except Error as e:
             self.logger.error(f"Failed to get table info: {str(e)}")
             return info
+        finally:
+            connection.close()
 
     def execute_script(self, sql_script: str) -> Dict[str, Any]:
         """
@@ -396,13 +837,27 @@ class DatabaseService:
         
         if not sql_script.strip():
             return result
-            
+
+        connection = self._acquire()
+        if not connection:
+            result['success'] = False
+            result['errors'].append('No database connection')
+            return result
+
         cursor = None
         try:
-            cursor = self.connection.cursor()
+            cursor = connection.cursor()
             
-            # Split script into individual statements
-            statements = [stmt.strip() for stmt in sql_script.split(';') if stmt.strip()]
+            # Split script into individual statements; sqlparse understands
+            # semicolons inside string literals and comments
+            if sqlparse is not None:
+                statements = [
+                    stmt.strip().rstrip(';').strip()
+                    for stmt in sqlparse.split(sql_script)
+                ]
+                statements = [stmt for stmt in statements if stmt]
+            else:
+                statements = [stmt.strip() for stmt in sql_script.split(';') if stmt.strip()]
             
             for stmt in statements:
                 try:
@@ -417,15 +872,16 @@ class DatabaseService:
             if result['failed_statements'] > 0:
                 result['success'] = False
                 
-            self.connection.commit()
+            connection.commit()
             return result
-            
+
         except Error as e:
             self.logger.error(f"Script execution failed: {str(e)}")
-            self.connection.rollback()
+            connection.rollback()
             result['success'] = False
             result['errors'].append(str(e))
             return result
         finally:
             if cursor:
-                cursor.close()
\ No newline at end of file
+                cursor.close()
+            connection.close()
\ No newline at end of file
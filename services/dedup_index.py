@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# hashing the first and last 64 KiB is enough to tell CSV exports apart
+# without reading multi-megabyte files end to end
+FRINGE_BYTES = 64 * 1024
+
+
+class DedupIndex:
+    """Persistent index of already-processed files.
+
+    Keys are ``(size, fringe_hash)`` where the fringe hash covers the first
+    and last 64 KiB of the file. Stored in SQLite (WAL mode) so the monitor
+    survives restarts without re-uploading a backlog it already worked
+    through. Uses xxhash when installed, blake2b otherwise.
+    """
+
+    def __init__(self, db_path: Optional[Path | str] = None) -> None:
+        if db_path is None:
+            db_path = Path.home() / ".cache" / "csvmon" / "dedup.sqlite"
+        db_path = Path(db_path)
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen ("
+            "size INTEGER NOT NULL, "
+            "fringe BLOB NOT NULL, "
+            "PRIMARY KEY (size, fringe))"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def fingerprint(file_path: Path | str) -> Optional[Tuple[int, bytes]]:
+        """Return the ``(size, fringe_hash)`` key, or None if unreadable."""
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            size = os.fstat(fd).st_size
+            head = os.pread(fd, FRINGE_BYTES, 0)
+            tail = os.pread(fd, FRINGE_BYTES, max(size - FRINGE_BYTES, 0))
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        if xxhash is not None:
+            digest = xxhash.xxh3_128(head + tail).digest()
+        else:
+            digest = hashlib.blake2b(head + tail, digest_size=16).digest()
+        return size, digest
+
+    def seen(self, key: Tuple[int, bytes]) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM seen WHERE size = ? AND fringe = ?", key
+            ).fetchone()
+        return row is not None
+
+    def record(self, key: Tuple[int, bytes]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO seen (size, fringe) VALUES (?, ?)", key
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,4 +1,11 @@
+import atexit
+import functools
+import queue
+import re
 import smtplib
+import threading
+import time
+from collections import defaultdict
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
@@ -6,56 +13,228 @@ from dotenv import load_dotenv
 import os
 import json
 import configparser
+import html
 from pathlib import Path
 from services.logger import Logger
 from utils.display_name import get_table_display_name
 
+try:
+    import aiosmtplib
+except ImportError:
+    aiosmtplib = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# .env یک بار در زمان import خوانده می‌شود؛ نه در هر ساخت notifier
+load_dotenv()
+_SMTP_DEFAULTS = {
+    'server': os.getenv('SMTP_SERVER'),
+    'port': int(os.getenv('SMTP_PORT', 465)),
+    'email': os.getenv('SENDER_EMAIL'),
+    'password': os.getenv('SENDER_PASSWORD'),
+}
+
+# اعلان‌های یک بازه در یک ایمیل ترکیبی جمع می‌شوند
+BATCH_WINDOW_SECONDS = 60
+
+# کش تنظیمات ایمیل؛ تا زمانی که فایل عوض نشده دوباره parse نمی‌شود
+_SETTINGS_CACHE = {'mtime': 0, 'data': []}
+
+@functools.lru_cache(maxsize=8)
+def _format_timestamp(second, fmt):
+    """strftime با رزولوشن یک ثانیه کش می‌شود؛ انفجار اعلان‌ها هزینه مشترک دارد"""
+    return datetime.fromtimestamp(second).strftime(fmt)
+
+
+# اسکلت HTML ثابت؛ فقط عنوان و آیتم‌ها در هر ارسال جایگذاری می‌شوند
+_BODY_TEMPLATE = """
+        <html>
+        <body>
+            <h2>{title}</h2>
+            <ul>
+                {items}
+            </ul>
+        </body>
+        </html>
+        """
+
+
 class EmailNotifier:
+    # جست‌وجوی مستقیم برای نام‌های دقیقاً نرمال‌شده؛ regex فقط fallback است
+    _TABLE_TYPE_MAP = {
+        'frame': 'frame',
+        'framereport': 'frame',
+        'framescutting': 'frame',
+        'glass': 'glass',
+        'glassreport': 'glass',
+        'glazing': 'glass',
+        'rush': 'rush',
+        'urgent': 'rush',
+        'casingcutting': 'casingcutting',
+        'optlabel': 'optlabel',
+        'casing': 'casing',
+        'extention': 'extention',
+        'urbancutting': 'urbancutting',
+        'wrapping': 'wrapping',
+    }
+
+    # one compiled alternation instead of per-call substring loops;
+    # more specific keywords precede generic ones (framescutting before frame)
+    _TYPE_RE = re.compile(
+        r'(?P<casingcutting>casingcutting)'
+        r'|(?P<urbancutting>urbancutting)'
+        r'|(?P<frame>framescutting|framereport|frame)'
+        r'|(?P<glass>glassreport|glazing|glass)'
+        r'|(?P<rush>rush|urgent)'
+        r'|(?P<optlabel>optlabel)'
+        r'|(?P<casing>casing)'
+        r'|(?P<extention>extention)'
+        r'|(?P<wrapping>wrapping)'
+    )
+
+    # subject template, body title template, timestamp format per kind
+    _KINDS = {
+        'duplicate': (
+            '\U0001f534 Alert! duplicate {table} Order {ts}',
+            'Duplicate {table} Orders Detected',
+            '[%Y-%m-%d %I:%M %p]',
+        ),
+        'resend': (
+            '\u26a0\ufe0f Alert! re send {table} Order {ts}',
+            'Re-Send {table} Orders Detected',
+            '[%Y-%m-%d %I:%M %p]',
+        ),
+        'rush': (
+            '\u26a0\ufe0f Alert! Rush orders send to cut {ts}',
+            'Rush Orders for {table} Sent to Cut',
+            '[%Y-%m-%d %I:%M:%S %p]',
+        ),
+    }
+
     def __init__(self, smtp_server=None, smtp_port=None, sender_email=None, sender_password=None):
         self.logger = Logger("EmailNotifier")
-        load_dotenv()
 
-        # خواندن تنظیمات SMTP از .env
-        self.smtp_server = smtp_server or os.getenv('SMTP_SERVER')
-        self.smtp_port = int(smtp_port or os.getenv('SMTP_PORT', 465))
-        self.sender_email = sender_email or os.getenv('SENDER_EMAIL')
-        self.sender_password = sender_password or os.getenv('SENDER_PASSWORD')
+        # تنظیمات SMTP از مقادیر import-time؛ .env دوباره parse نمی‌شود
+        self.smtp_server = smtp_server or _SMTP_DEFAULTS['server']
+        self.smtp_port = int(smtp_port or _SMTP_DEFAULTS['port'])
+        self.sender_email = sender_email or _SMTP_DEFAULTS['email']
+        self.sender_password = sender_password or _SMTP_DEFAULTS['password']
 
         # خواندن تنظیمات ایمیل‌ها از فایل settings.txt
         self.email_settings = self._load_email_settings()
+        # ایندکس نوع جدول -> گیرنده‌ها؛ جست‌وجوی O(1) به جای پیمایش هر بار
+        self._recipients_by_type = self._index_recipients(self.email_settings)
         
+        # اتصال SMTP پایدار که بین ارسال‌ها باز می‌ماند
+        self._server = None
+        self._from_header = f"vinylpro notification <{self.sender_email}>"
+
+        # صف دسته‌بندی اعلان‌ها؛ هر (جدول، نوع) یک ایمیل ترکیبی می‌گیرد
+        self._batch_lock = threading.Lock()
+        self._batches = defaultdict(list)
+        self._flush_timer = None
+
+        # صف ارسال؛ کار SMTP روی یک نخ پس‌زمینه انجام می‌شود
+        self._send_queue = queue.Queue()
+        self._send_worker_thread = None
+        self._last_smtp_error_log = 0.0
+
         if not all([self.smtp_server, self.smtp_port, self.sender_email, self.sender_password]):
             self.logger.error("Incomplete SMTP configuration! Email notifications will be disabled.")
             self.enabled = False
         else:
             self.enabled = True
 
+        # تایمر flush و نخ ارسال daemon هستند؛ بدون این، اعلان‌های در صف
+        # هنگام خروج برنامه بی‌صدا از بین می‌روند
+        atexit.register(self.close)
+
+    def _get_server(self):
+        """Return a live SMTP connection, reconnecting only when stale"""
+        if self._server is not None:
+            try:
+                self._server.noop()
+                return self._server
+            except Exception:
+                self._close_server()
+
+        if self.smtp_port == 465:
+            # استفاده از SSL
+            server = smtplib.SMTP_SSL(self.smtp_server, self.smtp_port)
+        else:
+            # استفاده از STARTTLS
+            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
+            server.starttls()
+        server.login(self.sender_email, self.sender_password)
+        self._server = server
+        return server
+
+    def _close_server(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                pass
+            self._server = None
+
+    def close(self):
+        """Flush pending batches, drain the send queue, and disconnect"""
+        self._flush()
+        if self._send_worker_thread is not None and self._send_worker_thread.is_alive():
+            self._send_queue.put(None)
+            self._send_worker_thread.join(timeout=30)
+            self._send_worker_thread = None
+        self._close_server()
+
+    def __del__(self):
+        try:
+            self._close_server()
+        except Exception:
+            pass
+
     def _load_email_settings(self):
-        """بارگذاری تنظیمات ایمیل از فایل settings.ini"""
+        """بارگذاری تنظیمات ایمیل؛ emails.json در اولویت، settings.ini برای سازگاری"""
         try:
-            # خواندن فایل تنظیمات
-            config = configparser.ConfigParser()
-            config.read(Path('config/settings.ini'))
-            
-            # بررسی وجود بخش emails
-            if 'emails' in config and 'emails' in config['emails']:
-                email_data = config['emails']['emails']
-                
-                # حذف فاصله‌های اضافی و خطوط جدید
-                email_data = ' '.join(email_data.split())
-                
-                # تبدیل JSON به لیست
+            json_path = Path('config/emails.json')
+            settings_path = json_path if json_path.exists() else Path('config/settings.ini')
+            try:
+                mtime = os.stat(settings_path).st_mtime_ns
+            except OSError:
+                mtime = 0
+            if mtime and mtime == _SETTINGS_CACHE['mtime']:
+                return _SETTINGS_CACHE['data']
+
+            if settings_path is json_path:
+                # فایل JSON خام؛ فقط یک parser لازم است
+                raw = settings_path.read_bytes()
+                try:
+                    email_list = orjson.loads(raw) if orjson is not None else json.loads(raw)
+                except (json.JSONDecodeError, ValueError) as e:
+                    self.logger.error(f"Invalid JSON format in email settings: {str(e)}")
+                    return []
+            else:
+                # مسیر قدیمی: استخراج JSON از داخل INI
+                config = configparser.ConfigParser()
+                config.read(settings_path)
+                if 'emails' not in config or 'emails' not in config['emails']:
+                    return []
+                email_data = ' '.join(config['emails']['emails'].split())
                 try:
                     email_list = json.loads(email_data)
-                    if not isinstance(email_list, list):
-                        self.logger.warning("Email settings is not a list, converting to list")
-                        email_list = [email_list]
-                    return email_list
                 except json.JSONDecodeError as e:
                     self.logger.error(f"Invalid JSON format in email settings: {str(e)}")
                     return []
-            return []
-        
+
+            if not isinstance(email_list, list):
+                self.logger.warning("Email settings is not a list, converting to list")
+                email_list = [email_list]
+            _SETTINGS_CACHE['mtime'] = mtime
+            _SETTINGS_CACHE['data'] = email_list
+            return email_list
+
         except Exception as e:
             self.logger.error(f"Failed to load email settings: {str(e)}")
             return []
@@ -63,213 +242,198 @@ class EmailNotifier:
 
     def notify_duplicate(self, table_name, duplicates, key_field):
         """Notify about duplicate orders (both order and sealed_unit_id match)"""
-        if not self.enabled:
-            return
-
-        recipients = self.get_recipients_for_table(table_name)
-        if not recipients:
-            self.logger.info(f"No recipients configured for table: {table_name}")
+        if not self.enabled or not duplicates:
             return
-
-        table_display_name = get_table_display_name(table_name)
-        
-        subject = f"🔴 Alert! duplicate {table_display_name} Order {datetime.now().strftime('[%Y-%m-%d %I:%M %p]')}"
-        
-        # Deduplicate orders based on 'order' field
-        unique_duplicates = {}
-        for dup in duplicates:
-            order = dup['order']
-            if order not in unique_duplicates:
-                unique_duplicates[order] = dup
-        
-        # Format unique duplicates for email body
-        formatted_duplicates = []
-        for dup in unique_duplicates.values():
-            formatted_duplicates.append(
-                f"Order: {dup['order']}, "
-                f"Date: {dup['original_date']}"
-            )
-            
-        body = f"""
-        <html>
-        <body>
-            <h2>Duplicate {table_display_name} Orders Detected</h2>
-            <ul>
-                {"".join(f"<li>{item}</li>" for item in formatted_duplicates)}
-            </ul>
-        </body>
-        </html>
-        """
-
-        self._send_email(recipients, subject, body)
+        self._enqueue('duplicate', table_name, duplicates)
 
     def notify_resend(self, table_name, resends, key_field):
         """Notify about re-sent orders (order number match only)"""
-        if not self.enabled:
+        if not self.enabled or not resends:
             return
+        self._enqueue('resend', table_name, resends)
 
-        recipients = self.get_recipients_for_table(table_name)
-        if not recipients:
-            self.logger.info(f"No recipients configured for table: {table_name}")
+    def notify_rush(self, table_name, rush_orders):
+        """Notify about rush orders"""
+        if not self.enabled or not rush_orders:
             return
+        self._enqueue('rush', table_name, rush_orders)
 
-        table_display_name = get_table_display_name(table_name)
-        
-        subject = f"⚠️ Alert! re send {table_display_name} Order {datetime.now().strftime('[%Y-%m-%d %I:%M %p]')}"
-        
-        # Deduplicate resends based on 'order' field
-        unique_resends = {}
-        for resend in resends:
-            order = resend['order']
-            if order not in unique_resends:
-                unique_resends[order] = resend
-        
-        # Format unique resends for email body
-        formatted_resends = []
-        for resend in unique_resends.values():
-            formatted_resends.append(
-                f"Order: {resend['order']}, Date: {resend['original_date']}"
-            )
-            
-        body = f"""
-        <html>
-        <body>
-            <h2>Re-Send {table_display_name} Orders Detected</h2>
-            <ul>
-                {"".join(f"<li>{item}</li>" for item in formatted_resends)}
-            </ul>
-        </body>
-        </html>
-        """
+    def _enqueue(self, kind, table_name, rows):
+        """Buffer rows and arm the flush timer if none is pending"""
+        with self._batch_lock:
+            self._batches[(table_name, kind)].extend(rows)
+            # Only arm when no timer is running: re-arming on every
+            # notification would push the flush out indefinitely under a
+            # steady stream. This bounds latency to BATCH_WINDOW_SECONDS.
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(BATCH_WINDOW_SECONDS, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
 
-        self._send_email(recipients, subject, body)
+    def _flush(self):
+        """Send one combined email per pending (table, kind) batch"""
+        with self._batch_lock:
+            batches = dict(self._batches)
+            self._batches.clear()
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
 
+        for (table_name, kind), rows in batches.items():
+            try:
+                self._send_batch(kind, table_name, rows)
+            except Exception as e:
+                self.logger.error(f"Failed to send {kind} notification for {table_name}: {str(e)}")
 
-    def notify_rush(self, table_name, rush_orders):
-        """Notify about rush orders"""
-        if not self.enabled:
+    def _send_batch(self, kind, table_name, rows):
+        """Render and send the combined notification for one batch"""
+        if not rows:
             return
-
         recipients = self.get_recipients_for_table(table_name)
         if not recipients:
-            self.logger.info(f"No recipients configured for table: {table_name}")
             return
 
         table_display_name = get_table_display_name(table_name)
-        
-        subject = f"⚠️ Alert! Rush orders send to cut {datetime.now().strftime('[%Y-%m-%d %I:%M:%S %p]')}"
-        
-        # Deduplicate rush orders based on 'order' field
-        unique_rush_orders = {}
-        for order in rush_orders:
-            order_id = order['order']
-            if order_id not in unique_rush_orders:
-                unique_rush_orders[order_id] = order
-        
-        # Format unique rush orders for email body
-        formatted_rush_orders = []
-        for order in unique_rush_orders.values():
-            formatted_rush_orders.append(
-                f"Order: {order['order']}" #, Date: {order['list_date']}"
+        subject_tpl, title_tpl, ts_fmt = self._KINDS[kind]
+        subject = subject_tpl.format(
+            table=table_display_name,
+            ts=_format_timestamp(int(time.time()), ts_fmt),
+        )
+
+        # Deduplicate rows based on 'order' field (last occurrence wins)
+        unique_rows = {row['order']: row for row in rows}
+
+        # یک گذر واحد: رندر و escape هر ردیف همان‌جا انجام می‌شود
+        if kind == 'rush':
+            items = "\n".join(
+                f"<li>Order: {html.escape(str(row['order']))}</li>"
+                for row in unique_rows.values()
+            )
+        else:
+            items = "\n".join(
+                f"<li>Order: {html.escape(str(row['order']))},"
+                f" Date: {html.escape(str(row['original_date']))}</li>"
+                for row in unique_rows.values()
             )
-            
-        body = f"""
-        <html>
-        <body>
-            <h2>Rush Orders for {table_display_name} Sent to Cut</h2>
-            <ul>
-                {"".join(f"<li>{item}</li>" for item in formatted_rush_orders)}
-            </ul>
-        </body>
-        </html>
-        """
+
+        body = _BODY_TEMPLATE.format(
+            title=title_tpl.format(table=table_display_name),
+            items=items,
+        )
 
         self._send_email(recipients, subject, body)
 
     def _send_email(self, recipients, subject, body):
-        """Send email to recipients"""
+        """Queue the message; a background worker owns the SMTP I/O"""
+        self._ensure_send_worker()
+        self._send_queue.put((recipients, subject, body))
+
+    def _ensure_send_worker(self):
+        if self._send_worker_thread is None or not self._send_worker_thread.is_alive():
+            self._send_worker_thread = threading.Thread(target=self._send_worker, daemon=True)
+            self._send_worker_thread.start()
+
+    def _send_worker(self):
+        """Drain queued messages so callers never block on the network"""
+        while True:
+            job = self._send_queue.get()
+            try:
+                if job is None:
+                    return
+                recipients, subject, body = job
+                self._deliver(recipients, subject, body)
+            finally:
+                self._send_queue.task_done()
+
+    def _build_message(self, subject, body):
         msg = MIMEMultipart('alternative')
-        msg['From'] = f"vinylpro notification <{self.sender_email}>"
+        msg['From'] = self._from_header
+        msg['To'] = self.sender_email
         msg['Subject'] = subject
         msg['X-Priority'] = '1'
+        msg.attach(MIMEText(body, 'html'))
+        return msg
+
+    async def a_send_email(self, recipients, subject, body):
+        """ارسال ناهمگام برای فراخوان‌های asyncio؛ حلقه رویداد بلاک نمی‌شود"""
+        if aiosmtplib is None:
+            # بدون aiosmtplib به صف نخ پس‌زمینه برمی‌گردیم
+            self._send_email(recipients, subject, body)
+            return
 
+        msg = self._build_message(subject, body)
+        smtp = aiosmtplib.SMTP(
+            hostname=self.smtp_server,
+            port=self.smtp_port,
+            use_tls=self.smtp_port == 465,
+        )
         try:
-            # روش امن‌تر با تشخیص خودکار پروتکل
-            if self.smtp_port == 465:
-                # استفاده از SSL
-                with smtplib.SMTP_SSL(self.smtp_server, self.smtp_port) as server:
-                    server.login(self.sender_email, self.sender_password)
-                    self._send_emails(server, msg, recipients, body)
-            else:
-                # استفاده از STARTTLS
-                with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                    server.starttls()  # فعال‌سازی TLS
-                    server.login(self.sender_email, self.sender_password)
-                    self._send_emails(server, msg, recipients, body)
-                    
+            await smtp.connect()
+            if self.smtp_port != 465:
+                await smtp.starttls()
+            await smtp.login(self.sender_email, self.sender_password)
+            await smtp.send_message(msg, sender=self.sender_email, recipients=recipients)
+            self.logger.info("Notification sent to %d recipients", len(recipients))
         except Exception as e:
             self.logger.error(f"SMTP connection failed: {str(e)}")
-            import traceback
-            self.logger.error(f"Traceback: {traceback.format_exc()}")
-
-    def _send_emails(self, server, msg, recipients, body):
-        """Send emails to list of recipients"""
-        for recipient in recipients:
+        finally:
             try:
-                recipient_msg = MIMEMultipart('alternative')
-                recipient_msg['From'] = msg['From']
-                recipient_msg['Subject'] = msg['Subject']
-                recipient_msg['X-Priority'] = msg['X-Priority']
-                recipient_msg['To'] = recipient
-                
-                html_part = MIMEText(body, 'html')
-                recipient_msg.attach(html_part)
-                
-                server.send_message(recipient_msg)
-                self.logger.info(f"Notification sent to {recipient}")
-            except Exception as e:
-                self.logger.error(f"Failed to send email to {recipient}: {str(e)}")
+                await smtp.quit()
+            except Exception:
+                pass
+
+    def _deliver(self, recipients, subject, body):
+        """Send one message to all recipients in a single SMTP transaction"""
+        msg = self._build_message(subject, body)
+
+        # فقط یک بار flatten؛ sendmail همان بایت‌ها را مستقیم می‌فرستد
+        payload = msg.as_bytes()
+
+        try:
+            # اتصال کش‌شده؛ فقط در صورت قطع شدن دوباره وصل می‌شود
+            server = self._get_server()
+            # یک DATA با چند RCPT TO؛ بدنه فقط یک بار ارسال می‌شود
+            server.sendmail(self.sender_email, recipients, payload)
+            self.logger.info("Notification sent to %d recipients", len(recipients))
+
+        except Exception as e:
+            # فقط خلاصه خطا؛ format_exc در خرابی‌های مکرر سرور گران است
+            now = time.monotonic()
+            if now - self._last_smtp_error_log >= 60:
+                self._last_smtp_error_log = now
+                self.logger.error(f"SMTP connection failed: {str(e)}")
+            self._close_server()
+
+    @staticmethod
+    def _index_recipients(email_settings):
+        """Build a table_type -> [emails] index from the raw settings list"""
+        index = {}
+        for email_config in email_settings:
+            email = email_config.get('email')
+            if not email:
+                continue
+            for key, flag in email_config.items():
+                if key != 'email' and flag:
+                    index.setdefault(key, []).append(email)
+        return index
 
     def get_recipients_for_table(self, table_name):
         """Get email recipients for specific table type"""
-        recipients = []
         table_type = self._determine_table_type(table_name)
         if not table_type:
-            self.logger.warning(f"No table type matched for: {table_name}")
-            return recipients
-        
-        self.logger.debug(f"Checking emails for table type: {table_type}")
-        
-        for email_config in self.email_settings:
-            if email_config.get(table_type, False):
-                recipients.append(email_config['email'])
-                self.logger.debug(f"Added recipient: {email_config['email']} for {table_type}")
-        
+            self.logger.warning("No table type matched for: %s", table_name)
+            return []
+
+        recipients = self._recipients_by_type.get(table_type, [])
         if not recipients:
-            self.logger.info(f"No recipients configured for table: {table_name} (type: {table_type})")
-        else:
-            self.logger.info(f"Found {len(recipients)} recipients for {table_name}")
-        
+            self.logger.info("No recipients configured for table: %s (type: %s)", table_name, table_type)
         return recipients
 
     def _determine_table_type(self, table_name):
         """Determine table type based on name"""
-        table_name = table_name.lower().strip()
-        
-        patterns = {
-            'frame': ['frame', 'framereport', 'framescutting'],
-            'glass': ['glass', 'glassreport', 'glazing'],
-            'rush': ['rush', 'urgent'],
-            'casingcutting': ['casingcutting'],
-            'optlabel': ['optlabel'],
-            'casing': ['casing'],
-            'extention': ['extention'],
-            'urbancutting': ['urbancutting'],
-            'wrapping': ['wrapping']
-        }
-        
-        for table_type, keywords in patterns.items():
-            if any(keyword in table_name for keyword in keywords):
-                return table_type
-        
-        return None
\ No newline at end of file
+        name = table_name.lower().strip()
+        table_type = self._TABLE_TYPE_MAP.get(name)
+        if table_type is not None:
+            return table_type
+        match = self._TYPE_RE.search(name)
+        return match.lastgroup if match else None
\ No newline at end of file
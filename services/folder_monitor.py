@@ -1,16 +1,91 @@
 from __future__ import annotations
 
+import functools
+import heapq
+import os
+import queue
+import re
 import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, Optional
 
+from .dedup_index import DedupIndex
 from .logger import Logger
 from .uploader import OdooCsvUploader, UploadError
 from config.config_manager import DesktopConfig
 
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
+
+try:
+    # C-level lock; noticeably cheaper acquire/release under event bursts
+    from fastrlock.rlock import FastRLock as _MonitorLock
+except ImportError:
+    _MonitorLock = threading.Lock
+
+# Event-driven watching still gets a low-frequency sweep as a safety net
+# for files that land while the observer is (re)starting.
+RESCAN_INTERVAL = 300
+
+# bounded memory of recently completed uploads (entries, seconds)
+RECENT_MAX = 4096
+RECENT_TTL = 3600.0
+
+# per-sweep cap; a 10k-file backlog is drained across ticks in O(cap) memory
+SCAN_BATCH_LIMIT = 64
+
+# events arriving within this window are coalesced into one deduped batch
+DEBOUNCE_WINDOW = 0.2
+
+# filesystems whose servers do not deliver inotify events to this client
+_NETWORK_FSTYPES = frozenset({"nfs", "nfs4", "cifs", "smbfs", "fuse.sshfs"})
+
+# case-insensitive match without allocating a lowercased copy of the path
+_SUFFIX_RE = re.compile(r"\.(?:csv|txt)\Z", re.IGNORECASE)
+
+
+class _SourceEventHandler(FileSystemEventHandler):
+    """Forwards watchdog create/move events into the monitor."""
+
+    def __init__(self, monitor: "FolderMonitor") -> None:
+        self._monitor = monitor
+
+    def on_created(self, event) -> None:
+        # filter on the raw string so non-CSV events never allocate a Path
+        if not event.is_directory and _SUFFIX_RE.search(event.src_path):
+            self._monitor._handle_event(event.src_path)
+
+    def on_moved(self, event) -> None:
+        if not event.is_directory and _SUFFIX_RE.search(event.dest_path):
+            self._monitor._handle_event(event.dest_path)
+
+    def on_closed(self, event) -> None:
+        # IN_CLOSE_WRITE: the writer is done, no settle wait needed
+        if not event.is_directory and _SUFFIX_RE.search(event.src_path):
+            self._monitor._handle_event(event.src_path, settled=True)
+
 
 class FolderMonitor:
+    # built once; the sweep's extension filter hits a frozen set
+    _ALLOWED_EXTENSIONS = frozenset({"csv", "txt"})
+
     def __init__(
         self,
         config: DesktopConfig,
@@ -22,14 +97,76 @@ class FolderMonitor:
         self.logger = logger
         self.running = False
         self._thread: Optional[threading.Thread] = None
-        self._lock = threading.Lock()
-        self._processed: set[str] = set()
+        self._lock = _MonitorLock()
+        # files currently being uploaded; guards against double dispatch only
+        self._in_flight: set[tuple] = set()
+        # recently completed uploads, LRU-bounded so memory stays flat
+        self._recent: OrderedDict[tuple, float] = OrderedDict()
+        # crash-safe content index so restarts skip already-uploaded files
+        try:
+            self._dedup_index: Optional[DedupIndex] = DedupIndex()
+        except Exception as exc:
+            self.logger.warning("Dedup index unavailable: %s", exc)
+            self._dedup_index = None
+        self._observer = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._event_q: queue.Queue = queue.Queue()
+        self._drainer: Optional[threading.Thread] = None
+        self._dir_cache: Dict[str, Optional[Path]] = {}
+        # source-dir string -> (archive, error); O(1) routing per file event
+        self._routes: Dict[str, tuple[Optional[Path], Optional[Path]]] = {}
+        # config snapshot taken in start(); avoids re-reading at file-event rate
+        self._entries: list[Dict[str, Optional[Path]]] = []
+        self._delete_source = False
+        self._auto_upload = True
 
     # ------------------------------------------------------------------ lifecycle
     def start(self) -> None:
         if self.running:
             return
         self.running = True
+
+        self._entries = self._monitor_entries()
+        self._routes = {
+            str(entry["source"]): (entry.get("archive"), entry.get("error"))
+            for entry in self._entries
+            if entry.get("source")
+        }
+        self._delete_source = bool(self.config.get("monitoring", "delete_source", False))
+        self._auto_upload = bool(self.config.get("monitoring", "auto_upload", True))
+        # bounded pool: bursts of events queue up instead of spawning threads
+        workers = int(self.config.get("monitoring", "workers", 4)) or 4
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fm")
+
+        if Observer is not None:
+            self.logger.info("Starting folder monitor (event-driven)")
+            self._drainer = threading.Thread(target=self._drain_events, daemon=True)
+            self._drainer.start()
+            self._observer = Observer()
+            handler = _SourceEventHandler(self)
+            network_sources = False
+            for source in self._routes:
+                if not Path(source).exists():
+                    continue
+                # inotify never fires for files written by other NFS/SMB
+                # clients, so network mounts are covered by the sweep only
+                if self._is_network_path(source):
+                    self.logger.info("Source %s is on a network mount; using sweeps", source)
+                    network_sources = True
+                    continue
+                self._observer.schedule(handler, source, recursive=False)
+            self._observer.start()
+            # pick up anything that was already waiting before the observer ran
+            self._process_existing_files()
+            if network_sources:
+                rescan = int(self.config.get("monitoring", "interval", 30)) or 30
+            else:
+                rescan = RESCAN_INTERVAL
+            self._thread = threading.Thread(target=self._run, args=(rescan,), daemon=True)
+            self._thread.start()
+            return
+
+        # watchdog not installed: keep the original polling behaviour
         interval = int(self.config.get("monitoring", "interval", 30)) or 30
         self.logger.info(f"Starting folder monitor (interval={interval}s)")
         self._process_existing_files()
@@ -41,9 +178,20 @@ class FolderMonitor:
             return
         self.logger.info("Stopping folder monitor")
         self.running = False
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=5)
+            self._observer = None
+        if self._drainer is not None:
+            self._event_q.put(None)
+            self._drainer.join(timeout=5)
+            self._drainer = None
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=1)
         self._thread = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
 
     # ------------------------------------------------------------------ core loop
     def _run(self, interval: int) -> None:
@@ -51,100 +199,325 @@ class FolderMonitor:
             try:
                 self._process_existing_files()
             except Exception as exc:  # pragma: no cover - safety net
-                self.logger.exception(f"Unexpected error during monitoring: {exc}")
+                self.logger.exception("Unexpected error during monitoring: %s", exc)
             time.sleep(interval)
 
-    def _process_existing_files(self) -> None:
+    def _monitor_entries(self) -> list[Dict[str, Optional[Path]]]:
         path_config = self.config.get_section("paths")
-        monitor_map: Dict[str, Dict[str, Optional[Path]]] = {
-            "path1": {
+        return [
+            {
                 "source": self._prepare_directory(path_config.get("path1")),
                 "archive": self._prepare_directory(path_config.get("move_path1")),
                 "error": self._prepare_directory(path_config.get("move_path2")),
             },
-            "path2": {
+            {
                 "source": self._prepare_directory(path_config.get("path2")),
                 "archive": self._prepare_directory(path_config.get("move_path2")),
                 "error": self._prepare_directory(path_config.get("move_path2")),
             },
-            "pdf": {
+            {
                 "source": self._prepare_directory(path_config.get("source_pdf")),
                 "archive": self._prepare_directory(path_config.get("move_pdf")),
                 "error": self._prepare_directory(path_config.get("move_pdf")),
             },
-        }
+        ]
+
+    def _handle_event(self, path_str: str, settled: bool = False) -> None:
+        # route on the raw string; a Path is built only for accepted events
+        route = self._routes.get(os.path.dirname(path_str))
+        if route is None:
+            self.logger.warning("No monitored directory matches %s", path_str)
+            return
+        # buffered so a burst of drops becomes one deduped batch
+        self._event_q.put((Path(path_str), route[0], route[1], settled))
 
-        for entry in monitor_map.values():
-            source = entry.get("source")
-            if not source or not source.exists():
-                continue
+    def _drain_events(self) -> None:
+        """Coalesce bursts of file events into deduped batches."""
+        while True:
+            item = self._event_q.get()
+            if item is None:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + DEBOUNCE_WINDOW
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self._event_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stopping = True
+                    break
+                batch.append(nxt)
 
-            for file_path in sorted(source.glob("*")):
-                if not file_path.is_file():
-                    continue
-                if file_path.suffix.lower() not in {".csv", ".txt"}:
-                    continue
-                self._process_file(
-                    file_path=file_path,
-                    archive_dir=entry.get("archive"),
-                    error_dir=entry.get("error"),
-                )
+            # the same file often fires several events back to back; a
+            # close-write observation for a path wins over earlier events
+            deduped: Dict[str, tuple] = {}
+            for fp, a, e, settled in batch:
+                key = str(fp)
+                prior = deduped.get(key)
+                deduped[key] = (fp, a, e, settled or (prior is not None and prior[3]))
+            pool = self._pool
+            for fp, a, e, settled in deduped.values():
+                if pool is not None:
+                    pool.submit(self._process_file, fp, a, e, settled)
+                else:
+                    self._process_file(file_path=fp, archive_dir=a, error_dir=e, settled=settled)
+            if stopping:
+                return
+
+    def _process_existing_files(self) -> None:
+        entries = [e for e in (self._entries or self._monitor_entries()) if e.get("source")]
+        pool = self._pool
+        if pool is not None and len(entries) > 1:
+            # overlap the dirent/stat I/O of the three source directories
+            scans = list(pool.map(self._scan_entry, entries))
+        else:
+            scans = [self._scan_entry(entry) for entry in entries]
+
+        for found in scans:
+            for file_path, archive_dir, error_dir in found:
+                # farm the backlog out so a big startup scan does not block
+                # the sweep thread (claims make concurrent workers safe)
+                if pool is not None:
+                    pool.submit(self._process_file, file_path, archive_dir, error_dir)
+                else:
+                    self._process_file(file_path=file_path, archive_dir=archive_dir, error_dir=error_dir)
+
+    def _scan_entry(
+        self, entry: Dict[str, Optional[Path]]
+    ) -> list[tuple[Path, Optional[Path], Optional[Path]]]:
+        source = entry.get("source")
+        if not source or not source.exists():
+            return []
+
+        # scandir reuses the dirent metadata, so no extra stat per entry;
+        # nsmallest keeps the alphabetical-first batch without materializing
+        # or fully sorting a huge directory listing
+        with os.scandir(source) as it:
+            names = heapq.nsmallest(
+                SCAN_BATCH_LIMIT,
+                (
+                    e.name
+                    for e in it
+                    if e.is_file(follow_symlinks=False)
+                    and e.name.rpartition(".")[2].lower() in self._ALLOWED_EXTENSIONS
+                ),
+            )
+        return [(source / name, entry.get("archive"), entry.get("error")) for name in names]
 
     # ------------------------------------------------------------------ per-file handling
-    def _process_file(self, file_path: Path, archive_dir: Optional[Path], error_dir: Optional[Path]) -> None:
-        with self._lock:
-            signature = str(file_path.resolve())
-            if signature in self._processed:
+    def _process_file(
+        self,
+        file_path: Path,
+        archive_dir: Optional[Path],
+        error_dir: Optional[Path],
+        settled: bool = False,
+    ) -> None:
+        # dedup on the stat fingerprint rather than the path: immune to
+        # renames, and a regenerated file at the same path is seen as new
+        signature = self._fingerprint(file_path)
+        if signature is None or not self._claim(signature):
+            return
+
+        # the producer may still be writing; wait until the size stops moving
+        # and no other process holds a lock on the file. Files announced by a
+        # close-write event skip the settle wait entirely.
+        if not settled:
+            initial = (signature[3], signature[2])
+            if not self._wait_stable(file_path, initial=initial) or self._is_file_locked(file_path):
+                self._in_flight.discard(signature)
+                return
+
+        # the settle wait may have observed further writes; re-key on the
+        # final fingerprint so the completed record matches future stats
+        fresh = self._fingerprint(file_path)
+        if fresh is None:
+            self._in_flight.discard(signature)
+            return
+        if fresh != signature:
+            self._in_flight.discard(signature)
+            if not self._claim(fresh):
+                return
+            signature = fresh
+
+        # content-level check survives restarts, unlike the in-memory LRU
+        content_key = None
+        if self._dedup_index is not None:
+            content_key = DedupIndex.fingerprint(file_path)
+            if content_key is not None and self._dedup_index.seen(content_key):
+                # already uploaded (typically a crash after the upload but
+                # before the archive move): finish the move now, otherwise
+                # the file strands in the source dir and every sweep
+                # re-claims, re-settles and re-hashes it forever
+                self.logger.info("Archiving already-uploaded file %s", file_path.name)
+                try:
+                    self.uploader._archive_file(file_path, archive_dir, self._delete_source)
+                except Exception as exc:
+                    self.logger.warning("Could not archive %s: %s", file_path.name, exc)
+                self._record_recent(signature)
+                self._in_flight.discard(signature)
                 return
-            self._processed.add(signature)
 
         type_code = self._guess_type_code(file_path)
-        delete_source = bool(self.config.get("monitoring", "delete_source", False))
-        auto_upload = bool(self.config.get("monitoring", "auto_upload", True))
 
         try:
-            self.logger.info(f"Processing file {file_path.name} -> type {type_code}")
+            self.logger.info("Processing file %s -> type %s", file_path.name, type_code)
             result = self.uploader.upload(
                 file_path=file_path,
                 type_code=type_code,
                 source_system="folder-monitor",
                 archive_dir=archive_dir,
                 error_dir=error_dir,
-                auto_register_lines=auto_upload,
-                delete_source=delete_source,
+                auto_register_lines=self._auto_upload,
+                delete_source=self._delete_source,
             )
             self.logger.info(
-                "Upload completed: id=%s rows=%s duplicates=%s errors=%s"
-                % (
-                    result.get("upload_id"),
-                    result.get("rows"),
-                    result.get("duplicates"),
-                    result.get("errors"),
-                )
+                "Upload completed: id=%s rows=%s duplicates=%s errors=%s",
+                result.get("upload_id"),
+                result.get("rows"),
+                result.get("duplicates"),
+                result.get("errors"),
             )
+            self._record_recent(signature)
+            if self._dedup_index is not None and content_key is not None:
+                try:
+                    self._dedup_index.record(content_key)
+                except Exception as exc:
+                    self.logger.warning("Could not persist dedup record: %s", exc)
         except UploadError as exc:
-            self.logger.error(f"Upload failed for {file_path.name}: {exc}")
+            self.logger.error("Upload failed for %s: %s", file_path.name, exc)
         except Exception as exc:  # pragma: no cover - defensive guard
-            self.logger.exception(f"Unexpected failure for {file_path.name}: {exc}")
+            self.logger.exception("Unexpected failure for %s: %s", file_path.name, exc)
         finally:
-            with self._lock:
-                self._processed.discard(signature)
+            # set.discard is atomic under the GIL; no lock needed to release
+            self._in_flight.discard(signature)
 
     # ------------------------------------------------------------------ helpers
     @staticmethod
-    def _prepare_directory(value: Optional[str]) -> Optional[Path]:
+    def _is_network_path(path: str) -> bool:
+        """Best-effort check whether a path lives on a network filesystem."""
+        try:
+            with open("/proc/mounts", encoding="utf-8") as handle:
+                mounts = [line.split()[1:3] for line in handle]
+        except OSError:
+            return False
+        best_type = ""
+        best_len = -1
+        for mountpoint, fstype in mounts:
+            if path == mountpoint or path.startswith(mountpoint.rstrip("/") + "/"):
+                if len(mountpoint) > best_len:
+                    best_len = len(mountpoint)
+                    best_type = fstype
+        return best_type in _NETWORK_FSTYPES
+
+    @staticmethod
+    def _fingerprint(file_path: Path) -> Optional[tuple]:
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _record_recent(self, signature: tuple) -> None:
+        """Remember a completed fingerprint in the LRU-bounded recent set."""
+        with self._lock:
+            self._recent[signature] = time.monotonic()
+            self._recent.move_to_end(signature)
+            while len(self._recent) > RECENT_MAX:
+                self._recent.popitem(last=False)
+
+    def _claim(self, signature: tuple) -> bool:
+        """Atomically mark a fingerprint in-flight unless seen recently."""
+        with self._lock:
+            if signature in self._in_flight:
+                return False
+            seen = self._recent.get(signature)
+            if seen is not None:
+                if time.monotonic() - seen < RECENT_TTL:
+                    return False
+                del self._recent[signature]
+            self._in_flight.add(signature)
+            return True
+
+    @staticmethod
+    def _wait_stable(
+        file_path: Path,
+        max_wait: float = 1.0,
+        interval: float = 0.02,
+        initial: Optional[tuple[int, int]] = None,
+    ) -> bool:
+        """Return True once two consecutive (size, mtime) samples match.
+
+        ``initial`` lets the caller supply an already-taken stat sample so
+        the common already-closed case costs one syscall, not two.
+        """
+        if initial is None:
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return False
+            initial = (st.st_size, st.st_mtime_ns)
+        previous = initial
+        deadline = time.monotonic() + max_wait
+        while time.monotonic() < deadline:
+            time.sleep(interval)
+            try:
+                st = os.stat(file_path)
+            except OSError:
+                return False
+            current = (st.st_size, st.st_mtime_ns)
+            if current == previous:
+                return True
+            previous = current
+        return True
+
+    @staticmethod
+    def _is_file_locked(file_path: Path) -> bool:
+        """Best-effort non-blocking probe for a writer still holding the file."""
+        try:
+            fd = os.open(file_path, os.O_RDONLY)
+        except OSError:
+            return True
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            return False
+        except OSError:
+            return True
+        finally:
+            os.close(fd)
+
+    def _prepare_directory(self, value: Optional[str]) -> Optional[Path]:
         if not value:
             return None
+        # mkdir issues a syscall even for existing dirs; resolve each string once
+        if value in self._dir_cache:
+            return self._dir_cache[value]
         path = Path(value).expanduser()
         try:
             path.mkdir(parents=True, exist_ok=True)
         except Exception:
-            return None
+            path = None
+        self._dir_cache[value] = path
         return path
 
     def _guess_type_code(self, file_path: Path) -> str:
-        stem = file_path.stem.upper()
-        parts = stem.replace("-", "_").split("_")
-        if parts:
-            return parts[0]
-        return stem[:32] or "UNKNOWN"
+        return _type_code_for(file_path.stem)
+
+
+@functools.lru_cache(maxsize=2048)
+def _type_code_for(stem: str) -> str:
+    """Pure function of the stem, so repeated basenames hit the cache."""
+    stem = stem.upper()
+    parts = stem.replace("-", "_").split("_")
+    if parts:
+        return parts[0]
+    return stem[:32] or "UNKNOWN"
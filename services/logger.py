@@ -1,7 +1,32 @@
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
 
+# one shared queue/listener per process: callers only enqueue records,
+# formatting and file/console I/O happen on the listener thread
+_log_queue: queue.Queue = queue.Queue(-1)
+_listener: QueueListener | None = None
+
+
+def _ensure_listener(log_folder: Path) -> None:
+    global _listener
+    if _listener is not None:
+        return
+
+    log_file = log_folder / f"{datetime.now().strftime('%Y-%m-%d')}.log"
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    file_handler = logging.FileHandler(log_file, encoding="utf-8")
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    _listener = QueueListener(_log_queue, file_handler, console_handler)
+    _listener.start()
+    atexit.register(_listener.stop)
+
 
 class Logger:
     def __init__(self, name: str, log_dir: Path | str = "logs") -> None:
@@ -11,28 +36,21 @@ class Logger:
         self.logger = logging.getLogger(name)
         if not self.logger.handlers:
             self.logger.setLevel(logging.DEBUG)
+            # the first log_dir seen wins; all loggers share the listener
+            _ensure_listener(log_folder)
+            self.logger.addHandler(QueueHandler(_log_queue))
 
-            log_file = log_folder / f"{datetime.now().strftime('%Y-%m-%d')}.log"
-            file_handler = logging.FileHandler(log_file, encoding="utf-8")
-            formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
-            file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
-
-            console_handler = logging.StreamHandler()
-            console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
-
-    def info(self, message: str) -> None:
-        self.logger.info(message)
+    def info(self, message: str, *args: object) -> None:
+        self.logger.info(message, *args)
 
-    def warning(self, message: str) -> None:
-        self.logger.warning(message)
+    def warning(self, message: str, *args: object) -> None:
+        self.logger.warning(message, *args)
 
-    def error(self, message: str) -> None:
-        self.logger.error(message)
+    def error(self, message: str, *args: object) -> None:
+        self.logger.error(message, *args)
 
-    def debug(self, message: str) -> None:
-        self.logger.debug(message)
+    def debug(self, message: str, *args: object) -> None:
+        self.logger.debug(message, *args)
 
-    def exception(self, message: str) -> None:
-        self.logger.exception(message)
+    def exception(self, message: str, *args: object) -> None:
+        self.logger.exception(message, *args)
@@ -2,9 +2,14 @@
 
 import base64
 import csv
+import ctypes
+import ctypes.util
+import errno
 import json
+import os
 import shutil
 import time
+from collections import OrderedDict
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -16,12 +21,55 @@ class UploadError(Exception):
     pass
 
 
+# renameat2(2) support, probed lazily; RENAME_NOREPLACE makes "move to a
+# fresh name" atomic instead of exists-check-then-rename
+_AT_FDCWD = -100
+_RENAME_NOREPLACE = 1
+_libc = None
+_renameat2_unsupported = False
+
+
+def _rename_noreplace(src: str, dest: str) -> bool:
+    """Atomically rename, refusing to overwrite.
+
+    Returns True on success, False when the call is unavailable (caller
+    should fall back), and raises FileExistsError when dest already exists.
+    """
+    global _libc, _renameat2_unsupported
+    if _renameat2_unsupported:
+        return False
+    if _libc is None:
+        try:
+            _libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            _libc.renameat2
+        except (OSError, TypeError, AttributeError):
+            _renameat2_unsupported = True
+            return False
+    ret = _libc.renameat2(
+        _AT_FDCWD, os.fsencode(src), _AT_FDCWD, os.fsencode(dest), _RENAME_NOREPLACE
+    )
+    if ret == 0:
+        return True
+    err = ctypes.get_errno()
+    if err == errno.EEXIST:
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), dest)
+    if err in (errno.ENOSYS, errno.EINVAL):
+        _renameat2_unsupported = True
+    return False
+
+
 class OdooCsvUploader:
     """High-level helper for pushing CSV files into the custom Odoo models."""
 
     def __init__(self, client: OdooRPCClient):
         self.client = client
         self._model_fields_cache: Dict[str, Dict[str, Dict]] = {}
+        self._profile_cache: Dict[str, Dict] = {}
+        self._known_dirs: set[Path] = set()
+        # (dir, stem) -> next collision counter so repeats skip the probe loop
+        self._collision_next: OrderedDict[Tuple[str, str], int] = OrderedDict()
+        # (src dir, dest dir) pairs known to sit on different filesystems
+        self._cross_fs: set[Tuple[str, str]] = set()
         self.logger = Logger("OdooCsvUploader")
 
     # ------------------------------------------------------------------ profiles
@@ -104,8 +152,28 @@ class OdooCsvUploader:
 
         return {"upload_id": upload_id, **stats}
 
+    def upload_many(self, items: List[Dict]) -> List[Dict[str, int]]:
+        """Upload a batch of files in one call.
+
+        Each item is a dict of ``upload`` keyword arguments. Profile lookups
+        are cached across the batch, so N files of the same type cost one
+        round-trip instead of N; a failed item is reported in its result
+        slot without aborting the rest of the batch.
+        """
+        results: List[Dict[str, int]] = []
+        for item in items:
+            try:
+                results.append(self.upload(**item))
+            except Exception as exc:
+                self.logger.error(f"Batch upload item failed: {exc}")
+                results.append({"upload_id": 0, "rows": 0, "duplicates": 0, "errors": 1})
+        return results
+
     # ------------------------------------------------------------------ helpers
     def _get_profile(self, type_code: str) -> Dict:
+        cached = self._profile_cache.get(type_code)
+        if cached is not None:
+            return cached
         profiles = self.client.search_read(
             "csv.upload.type",
             domain=[["code", "=", type_code]],
@@ -123,6 +191,7 @@ class OdooCsvUploader:
         )
         if not profiles:
             raise UploadError(f"No CSV Upload Type found with code '{type_code}'")
+        self._profile_cache[type_code] = profiles[0]
         return profiles[0]
 
     def _parse_json(self, value) -> Optional[Dict]:
@@ -354,10 +423,9 @@ class OdooCsvUploader:
         if not archive_dir:
             return
 
-        archive_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(archive_dir)
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        dest = archive_dir / f"{src.stem}_{timestamp}{src.suffix}"
-        self._safe_move(src, dest)
+        self._move_unique(src, archive_dir, f"{src.stem}_{timestamp}", src.suffix)
 
     def _handle_failed_file(
         self,
@@ -375,20 +443,108 @@ class OdooCsvUploader:
         if not error_dir:
             return
 
-        error_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(error_dir)
         timestamp = time.strftime("%Y%m%d_%H%M%S")
-        dest = error_dir / f"{src.stem}_ERROR_{timestamp}{src.suffix}"
-        self._safe_move(src, dest)
+        self._move_unique(src, error_dir, f"{src.stem}_ERROR_{timestamp}", src.suffix)
+
+    def _move_unique(self, src: Path, directory: Path, stem: str, suffix: str) -> None:
+        """Move src into directory under a collision-free name."""
+        while True:
+            dest = self._unique_dest(directory, stem, suffix)
+            try:
+                # atomic claim-and-move: no window between the exists probe
+                # and the rename for another producer to grab the name
+                if _rename_noreplace(str(src), str(dest)):
+                    return
+            except FileExistsError:
+                continue
+            # renameat2 unavailable or cross-device: best-effort fallback
+            self._safe_move(src, dest)
+            return
+
+    def _unique_dest(self, directory: Path, stem: str, suffix: str) -> Path:
+        dest = directory / f"{stem}{suffix}"
+        if not dest.exists():
+            return dest
+        # start probing from the last counter used for this (dir, stem)
+        key = (str(directory), stem)
+        counter = self._collision_next.get(key, 1)
+        while True:
+            dest = directory / f"{stem}_{counter}{suffix}"
+            counter += 1
+            if not dest.exists():
+                break
+        self._collision_next[key] = counter
+        self._collision_next.move_to_end(key)
+        if len(self._collision_next) > 256:
+            self._collision_next.popitem(last=False)
+        return dest
+
+    def _ensure_dir(self, directory: Path) -> None:
+        # destinations are a small fixed set; mkdir only on first sight
+        if directory not in self._known_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(directory)
 
     def _safe_move(self, src: Path, dest: Path) -> None:
+        fs_key = (str(src.parent), str(dest.parent))
+        if fs_key not in self._cross_fs:
+            try:
+                # atomic on every platform, overwrites an existing dest
+                os.replace(src, dest)
+                return
+            except OSError as exc:
+                if exc.errno == errno.EXDEV:
+                    # remember the verdict; every later move between these
+                    # two directories skips the doomed rename attempt
+                    self._cross_fs.add(fs_key)
+                else:
+                    # e.g. EACCES or a Windows sharing violation on a file
+                    # just released by its writer; the copy below may still
+                    # succeed, so don't strand the file in the source dir
+                    self.logger.warning(f"Rename failed for {src.name}: {exc}; falling back to copy")
+        # rename not possible: stage a copy next to dest, then swap it in
+        tmp = dest.with_suffix(dest.suffix + ".part")
         try:
-            shutil.move(str(src), str(dest))
-        except Exception:
+            self._copy_kernel(src, tmp)
+            os.replace(tmp, dest)
+            src.unlink(missing_ok=True)
+        except Exception as exc:
+            tmp.unlink(missing_ok=True)
+            self.logger.error(f"Could not move {src} to {dest}: {exc}")
+
+    @staticmethod
+    def _copy_kernel(src: Path, dest: Path) -> None:
+        """Copy file bytes in kernel space where the platform allows it."""
+        with open(src, "rb") as fsrc, open(dest, "wb") as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            size = os.fstat(src_fd).st_size
+            remaining = size
             try:
-                shutil.copy2(str(src), str(dest))
-                src.unlink(missing_ok=True)
-            except Exception:
-                pass
+                if not hasattr(os, "copy_file_range"):
+                    raise OSError
+                while remaining > 0:
+                    copied = os.copy_file_range(src_fd, dst_fd, remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                try:
+                    offset = size - remaining
+                    while remaining > 0:
+                        sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+                        if sent == 0:
+                            break
+                        offset += sent
+                        remaining -= sent
+                except (OSError, AttributeError):
+                    fsrc.seek(size - remaining)
+                    shutil.copyfileobj(fsrc, fdst)
+                    remaining = 0
+            os.fsync(dst_fd)
+        st = os.stat(src)
+        os.utime(dest, ns=(st.st_atime_ns, st.st_mtime_ns))
+        shutil.copymode(str(src), str(dest))
 
 
 